@@ -1,4 +1,3 @@
-import random
 import csv
 import time
 import numpy as np
@@ -7,222 +6,384 @@ from mininet.node import OVSController
 from mininet.topo import Topo
 from mininet.link import TCLink
 import re
+import logging
+import os
+import selectors
+from subprocess import PIPE, DEVNULL
+from dataclasses import dataclass
+
+try:
+    from numba import njit, vectorize
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+
+_RTT_RE = re.compile(r'rtt min/avg/max/mdev = [\d.]+/([\d.]+)/')
+_LOSS_RE = re.compile(r'([\d.]+)% packet loss')
+
+# ping 응답이 없을 때 기록할 지연 시간(ms): 도달 불가 클라우드가 최저 평점을 받도록 함
+_UNREACHABLE_DELAY = 1000.0
+
+# 링크 대역폭 대비 iperf 전송률 (UDP/IP 헤더 오버헤드 여유)
+_PROBE_RATE_RATIO = 0.9
+
+# 시간대(0~23시)별 네트워크 활동 수준
+_ACTIVITY = np.array([0.2, 0.1, 0.1, 0.1, 0.2, 0.3,
+                      0.4, 0.6, 0.8, 0.9, 0.9, 0.9,
+                      0.8, 0.7, 0.8, 0.9, 1.0, 1.0,
+                      0.9, 0.8, 0.7, 0.6, 0.5, 0.3])
 
 class CloudServer:
-    def __init__(self, id, base_cpu, base_bw):
+    def __init__(self, id, base_cpu, base_bw, rng=None):
+        if rng is None:
+            rng = np.random.default_rng()
         self.id = id
-        self.cpu_usage = {h: max(0.1, min(1.0, np.random.normal(base_cpu, 0.1))) for h in range(24)}
-        self.bandwidth = {h: max(100, min(1000, np.random.normal(base_bw, 50))) for h in range(24)}
-        self.latency = {h: max(1, min(100, np.random.normal(20, 5))) for h in range(24)}
+        self.name = f'cloud{id}'
+        # (3, 24) 배열: CPU 사용량, 대역폭, 지연 시간의 시간별 값
+        self._feat = np.stack([
+            np.clip(rng.normal(base_cpu, 0.1, 24), 0.1, 1.0),
+            np.clip(rng.normal(base_bw, 50, 24), 100, 1000),
+            np.clip(rng.normal(20, 5, 24), 1, 100),
+        ])
+        self.cpu_usage, self.bandwidth, self.latency = self._feat
+        self.node = None
 
     def get_features(self, hour):
-        return [self.cpu_usage[hour], self.bandwidth[hour], self.latency[hour]]
+        return self._feat[:, hour].tolist()
 
 class Device:
     def __init__(self, id, cpu, bw, delay, loss, self_processing_power):
         self.id = id
+        self.name = f'device{id}'
         self.cpu = cpu
         self.bandwidth = bw
         self.delay = delay
         self.loss = loss
         self.self_processing_power = self_processing_power
+        self.node = None
 
     def get_features(self):
         return [self.cpu, self.bandwidth, self.delay, self.loss, self.self_processing_power]
 
+@dataclass
+class NetworkState:
+    loads: np.ndarray           # (M,) 클라우드별 누적 선택 횟수
+    metrics: np.ndarray         # (N, M, 3) 마지막으로 측정한 (bandwidth, delay, loss)
+    total_load: int = 0         # loads의 합계 (선택 시마다 함께 증가)
+
+    @classmethod
+    def from_entities(cls, cloud_servers, devices):
+        return cls(loads=np.zeros(len(cloud_servers), dtype=np.float32),
+                   metrics=np.zeros((len(devices), len(cloud_servers), 3), dtype=np.float32))
+
 class CustomTopo(Topo):
     def build(self, cloud_servers, devices):
         switch = self.addSwitch('s1')
         
         for cloud in cloud_servers:
-            self.addHost(f'cloud{cloud.id}')
-            self.addLink(f'cloud{cloud.id}', switch, 
+            self.addHost(cloud.name)
+            self.addLink(cloud.name, switch, 
                          bw=cloud.bandwidth[0], delay=f'{cloud.latency[0]}ms')
         
         for device in devices:
-            self.addHost(f'device{device.id}')
-            self.addLink(f'device{device.id}', switch, 
+            self.addHost(device.name)
+            self.addLink(device.name, switch, 
                          bw=device.bandwidth, delay=f'{device.delay}ms', loss=device.loss)
 
 def create_network(num_clouds, num_devices):
-    cloud_servers = [CloudServer(i+1, random.uniform(0.5, 0.8), random.uniform(500, 800)) for i in range(num_clouds)]
-    devices = [Device(i+1, random.uniform(0.1, 0.5), random.uniform(10, 100), 
-                      random.uniform(1, 50), random.uniform(0, 5),
-                      random.uniform(0.1, 0.3))  # 자체 처리 능력을 낮게 설정
-               for i in range(num_devices)]
+    rng = np.random.default_rng()
+    base_cpu = rng.uniform(0.5, 0.8, num_clouds)
+    base_bw = rng.uniform(500, 800, num_clouds)
+    cloud_servers = [CloudServer(i+1, base_cpu[i], base_bw[i], rng) for i in range(num_clouds)]
+    
+    device_params = np.column_stack([
+        rng.uniform(0.1, 0.5, num_devices),
+        rng.uniform(10, 100, num_devices),
+        rng.uniform(1, 50, num_devices),
+        rng.uniform(0, 5, num_devices),
+        rng.uniform(0.1, 0.3, num_devices),  # 자체 처리 능력을 낮게 설정
+    ]).tolist()
+    devices = [Device(i+1, *params) for i, params in enumerate(device_params)]
     
     topo = CustomTopo(cloud_servers, devices)
     net = Mininet(topo=topo, controller=OVSController, link=TCLink)
     return net, cloud_servers, devices
 
+def attach_nodes(net, cloud_servers, devices):
+    for cloud in cloud_servers:
+        cloud.node = net.get(cloud.name)
+    for device in devices:
+        device.node = net.get(device.name)
+
 def get_network_activity(hour):
-    activity = {
-        0: 0.2, 1: 0.1, 2: 0.1, 3: 0.1, 4: 0.2, 5: 0.3,
-        6: 0.4, 7: 0.6, 8: 0.8, 9: 0.9, 10: 0.9, 11: 0.9,
-        12: 0.8, 13: 0.7, 14: 0.8, 15: 0.9, 16: 1.0, 17: 1.0,
-        18: 0.9, 19: 0.8, 20: 0.7, 21: 0.6, 22: 0.5, 23: 0.3
-    }
-    return activity[hour]
-
-def measure_performance(net, src, dst):
-    iperf_result = src.cmd(f'iperf -c {dst.IP()} -t 5')
-    bandwidth = 0.0
-    match = re.search(r'(\d+(\.\d+)?) ([MGK])bits/sec', iperf_result)
-    if match:
-        value, unit = float(match.group(1)), match.group(3)
-        if unit == 'G':
-            bandwidth = value * 1000
-        elif unit == 'M':
-            bandwidth = value
-        elif unit == 'K':
-            bandwidth = value / 1000
+    return float(_ACTIVITY[hour])
+
+def start_iperf_servers(net, cloud_servers, timeout=5):
+    for cloud in cloud_servers:
+        cloud.node.cmd('iperf -s -u &')
     
-    ping_result = src.cmd(f'ping -c 10 {dst.IP()}')
-    delay_match = re.search(r'rtt min/avg/max/mdev = [\d.]+/([\d.]+)/[\d.]+/[\d.]+ ms', ping_result)
-    delay = float(delay_match.group(1)) if delay_match else 0.0
+    # 첫 주기의 측정이 서버보다 먼저 도착하지 않도록 모든 서버가 UDP 5001 포트를 열 때까지 대기
+    deadline = time.time() + timeout
+    for cloud in cloud_servers:
+        while not cloud.node.cmd('ss -Hlun sport = :5001').strip():
+            if time.time() > deadline:
+                raise RuntimeError(f"iperf server on {cloud.name} did not start within {timeout}s")
+            time.sleep(0.1)
+
+def start_probes(device, cloud):
+    # 1초 UDP 측정으로 대역폭과 손실률을 함께 얻음 (iperf2는 RTT를 보고하지 않으므로 ping은 짧게 유지)
+    # 전송률을 디바이스 링크 대역폭보다 낮게 잡아야 손실률이 과부하가 아닌 링크 손실을 반영함
+    # (TCLink의 Mbit/s는 10^6 단위이고 iperf2의 'M'은 2^20이므로 bit/s로 직접 지정하고 헤더 몫의 여유를 둠)
+    # ping을 iperf보다 먼저 실행해 지연 시간이 같은 쌍의 iperf 부하로 늘어나지 않도록 함 (다른 쌍과는 병렬)
+    dst_ip = cloud.node.IP()
+    rate = int(device.bandwidth * 1e6 * _PROBE_RATE_RATIO)
+    probe = (f'ping -q -c 5 -i 0.2 {dst_ip}; '
+             f'iperf -c {dst_ip} -u -b {rate} -t 1 -y C')
+    return device.node.popen(['sh', '-c', probe], stdout=PIPE, stderr=DEVNULL)
+
+def collect_outputs(procs):
+    # 하나의 selector 루프로 모든 프로세스의 출력을 EOF까지 동시에 읽음 (FD_SETSIZE 제한 없음)
+    chunks = [[] for _ in procs]
+    with selectors.DefaultSelector() as selector:
+        for i, proc in enumerate(procs):
+            selector.register(proc.stdout, selectors.EVENT_READ, i)
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, 1 << 16)
+                if data:
+                    chunks[key.data].append(data)
+                else:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    procs[key.data].wait()
+    return [b''.join(chunk).decode() for chunk in chunks]
+
+def parse_probes(output):
+    bandwidth = 0.0
+    # ping 출력 뒤에 iperf CSV가 이어지며, 마지막 행이 서버 리포트:
+    # ...,bytes,bits_per_second,jitter,lost,total,lost_percent,out_of_order
+    report = output.rstrip().rsplit('\n', 1)[-1]
+    fields = report.split(',', 13)
+    if len(fields) == 14:
+        bandwidth = float(fields[8]) / 1e6
+        loss = float(fields[12])
+    else:
+        # 서버 리포트가 없으면 ping 손실률을 쓰고, 그것도 없으면 전부 손실된 것으로 봄
+        loss_match = _LOSS_RE.search(output)
+        loss = float(loss_match.group(1)) if loss_match else 100.0
     
-    loss_match = re.search(r'(\d+)% packet loss', ping_result)
-    loss = float(loss_match.group(1)) if loss_match else 0.0
+    delay_match = _RTT_RE.search(output)
+    delay = float(delay_match.group(1)) if delay_match else _UNREACHABLE_DELAY
     
     return bandwidth, delay, loss
 
+def measure_all(pairs):
+    procs = [start_probes(device, cloud) for device, cloud in pairs]
+    return [parse_probes(output) for output in collect_outputs(procs)]
+
+def measure_round_robin(devices, cloud_servers, candidates):
+    # 라운드 r에서 디바이스 d는 (d + r) % k번째 후보 클라우드 하나만 측정하여, 디바이스 링크에는
+    # 측정 흐름이 하나, 각 클라우드 링크에는 약 N/M개만 실리도록 함 (링크 용량은 네임스페이스 간에 공유됨)
+    num_devices, k = candidates.shape
+    results = [None] * (num_devices * k)
+    for r in range(k):
+        columns = [(d + r) % k for d in range(num_devices)]
+        round_results = measure_all([(device, cloud_servers[candidates[d, j]])
+                                     for d, (device, j) in enumerate(zip(devices, columns))])
+        for d, (j, result) in enumerate(zip(columns, round_results)):
+            results[d * k + j] = result
+    return results
+
 def calculate_rating(bandwidth, delay, loss):
     norm_bandwidth = bandwidth / 100
     norm_delay = delay / 100
     norm_loss = loss / 100
     rating = 5 * (0.2 * norm_bandwidth + 0.4 * (1 - norm_delay) + 0.4 * (1 - norm_loss))
-    return round(max(0, min(5, rating)), 2)
-
-def select_best_cloud(net, device, cloud_servers, cloud_loads, hour):
-    best_entity = None
-    best_score = float('-inf')
-    best_rating = 0
-    best_bandwidth = 0
-    best_delay = 0
-    best_loss = 0
-    activity = get_network_activity(hour)
+    # numba의 @vectorize 커널로도 컴파일되도록 스칼라 분기로 0~5 범위 제한
+    if rating < 0:
+        rating = 0.0
+    elif rating > 5:
+        rating = 5.0
+    return round(rating, 2)
+
+def cloud_scores(bandwidth, delay, loss, loads, total_load, activity):
+    # 상수도 float32로 두어 float64로 승격되지 않도록 함
+    performance_score = (bandwidth / np.float32(100)) - (delay / np.float32(100)) - (loss / np.float32(10))
+    if total_load == 0:
+        load_score = np.ones_like(loads)
+    else:
+        load_score = np.float32(1) - (loads / np.float32(total_load))
     
-    for cloud in cloud_servers:
-        bandwidth, delay, loss = measure_performance(net, net.get(f'device{device.id}'), net.get(f'cloud{cloud.id}'))
-        rating = calculate_rating(bandwidth, delay, loss)
-        performance_score = (bandwidth / 100) - (delay / 100) - (loss / 10)
-        
-        total_load = sum(cloud_loads.values())
-        if total_load == 0:
-            load_score = 1
-        else:
-            load_score = 1 - (cloud_loads[cloud.id] / total_load)
-        
-        if activity > 0.7:
-            score = performance_score * 0.4 + load_score * 0.6
-        else:
-            score = performance_score * 0.7 + load_score * 0.3
-        
-        if score > best_score:
-            best_score = score
-            best_entity = cloud
-            best_rating = rating
-            best_bandwidth = bandwidth
-            best_delay = delay
-            best_loss = loss
-
-    # 최악의 상황에서만 'self' 선택
-    self_score = device.self_processing_power - (device.cpu * 0.2)
-    self_rating = calculate_rating(device.bandwidth, device.delay, device.loss)
+    # activity는 Python float(numba 경로에서는 float32)이므로 일반 리터럴과 비교해야 두 경로의 결과가 같음
+    if activity > 0.7:
+        performance_weight, load_weight = np.float32(0.4), np.float32(0.6)
+    else:
+        performance_weight, load_weight = np.float32(0.7), np.float32(0.3)
+    return performance_score * performance_weight + load_score * load_weight
+
+def score_clouds(bandwidth, delay, loss, loads, total_load, activity):
+    score = cloud_scores(bandwidth, delay, loss, loads, total_load, activity)
+    best_idx = np.argmax(score)
+    best_rating = calculate_rating(bandwidth[best_idx], delay[best_idx], loss[best_idx])
+    return best_idx, score[best_idx], best_rating
+
+if _NUMBA_AVAILABLE:
+    # 시그니처를 고정해 import 시점에 float32 버전으로 미리 컴파일
+    # 원소별 함수이므로 ufunc로 컴파일하여 배열 전체에 대해서도 한 번에 호출 가능
+    calculate_rating = vectorize(['float64(float32, float32, float32)', 'float64(float64, float64, float64)'],
+                                 cache=True)(calculate_rating)
+    cloud_scores = njit(['float32[:](float32[:], float32[:], float32[:], float32[:], int64, float32)',
+                         'float32[:, :](float32[:, :], float32[:, :], float32[:, :], float32[:], int64, float32)'],
+                        cache=True)(cloud_scores)
+    score_clouds = njit('Tuple((int64, float32, float64))(float32[:], float32[:], float32[:], float32[:], int64, float32)',
+                        cache=True)(score_clouds)
+
+def select_best_cloud(device, candidates, results, state, activity):
+    bandwidth, delay, loss = np.array(results, dtype=np.float32).T
     
-    if self_score > best_score and best_rating < 1.0:  # 매우 낮은 rating일 때만 self 선택
-        best_entity = 'self'
-        best_rating = self_rating
-        best_bandwidth = device.bandwidth
-        best_delay = device.delay
-        best_loss = device.loss
+    best, best_score, best_rating = score_clouds(bandwidth, delay, loss, state.loads[candidates], state.total_load, activity)
+    best_idx = int(candidates[best])
+    best_bandwidth, best_delay, best_loss = results[best]
+
+    # 최악의 상황에서만 'self' 선택 (매우 낮은 rating일 때만 self 점수를 계산)
+    if best_rating < 1.0:
+        self_score = device.self_processing_power - (device.cpu * 0.2)
+        if self_score > best_score:
+            best_idx = -1
+            best_rating = calculate_rating(device.bandwidth, device.delay, device.loss)
+            best_bandwidth = device.bandwidth
+            best_delay = device.delay
+            best_loss = device.loss
 
-    return best_entity, best_bandwidth, best_delay, best_loss, best_rating
+    return best_idx, best_bandwidth, best_delay, best_loss, best_rating
 
 def save_characteristics(devices, cloud_servers):
     with open('device_characteristics.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
+        writer = csv.writer(csvfile, lineterminator='\n')
         writer.writerow(['Device ID', 'CPU', 'Bandwidth', 'Delay', 'Loss', 'Self Processing Power'])
         for device in devices:
             writer.writerow([device.id] + device.get_features())
 
     with open('cloud_characteristics.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
+        writer = csv.writer(csvfile, lineterminator='\n')
         writer.writerow(['Cloud ID'] + ['CPU_' + str(h) for h in range(24)] + 
                         ['Bandwidth_' + str(h) for h in range(24)] + 
                         ['Latency_' + str(h) for h in range(24)])
-        for cloud in cloud_servers:
-            row = [cloud.id]
-            for h in range(24):
-                row.extend(cloud.get_features(h))
-            writer.writerow(row)
+        # 시간별 (CPU, 대역폭, 지연 시간) 순서로 펼쳐서 기록
+        writer.writerows([cloud.id, *cloud._feat.T.ravel().tolist()] for cloud in cloud_servers)
+
+    log.info("Device and cloud characteristics saved to CSV files.")
 
-    print("Device and cloud characteristics saved to CSV files.")
+def select_candidates(state, activity, top_k):
+    # 이전 측정값으로 계산한 예상 점수가 높은 상위 top_k개 클라우드만 다시 측정
+    provisional = cloud_scores(state.metrics[..., 0], state.metrics[..., 1], state.metrics[..., 2],
+                               state.loads, state.total_load, activity)
+    return np.argsort(-provisional, axis=1)[:, :top_k]
 
-def run_simulation(net, cloud_servers, devices, duration=1440, interval=10):
-    print("Starting network simulation...")
+def run_simulation(net, cloud_servers, devices, duration=1440, interval=10, top_k=2, full_probe_every=6):
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    if full_probe_every < 1:
+        raise ValueError(f"full_probe_every must be at least 1, got {full_probe_every}")
+    
+    log.info("Starting network simulation...")
     start_time = time.time()
-    cloud_loads = {cloud.id: 0 for cloud in cloud_servers}
+    state = NetworkState.from_entities(cloud_servers, devices)
+    num_clouds = len(cloud_servers)
+    all_clouds = np.tile(np.arange(num_clouds), (len(devices), 1))
+    device_rows = np.arange(len(devices))[:, None]
     
-    with open('simulation_results.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
+    with open('simulation_results.csv', 'w', newline='', buffering=1 << 16) as csvfile:
+        writer = csv.writer(csvfile, lineterminator='\n')
         writer.writerow(['Timestamp', 'Hour', 'Device', 'Selected Entity', 'Bandwidth', 'Delay', 'Loss', 'Rating',
                          'Device CPU', 'Device BW', 'Device Delay', 'Device Loss', 'Device Self Processing',
                          'Cloud CPU Usage', 'Cloud BW', 'Cloud Latency', 'Network Activity'])
         
         cycle_count = 0
-        while time.time() - start_time < duration * 60:  # Duration in minutes
+        now = start_time
+        deadline = start_time
+        while now - start_time < duration * 60:  # Duration in minutes
             cycle_count += 1
-            current_time = time.time() - start_time
+            current_time = now - start_time
             simulated_hour = int((current_time / 600) % 24)  # 600 seconds (10 minutes) represent 1 hour
             activity = get_network_activity(simulated_hour)
             
-            print(f"Simulation cycle {cycle_count} - Simulated hour: {simulated_hour}, Network activity: {activity:.2f}")
+            log.info("Simulation cycle %d - Simulated hour: %d, Network activity: %.2f", cycle_count, simulated_hour, activity)
+            
+            # 주기적으로 전체 클라우드를 측정해 캐시된 측정값을 갱신
+            if top_k >= num_clouds or (cycle_count - 1) % full_probe_every == 0:
+                candidates = all_clouds
+            else:
+                candidates = select_candidates(state, activity, top_k)
+            k = candidates.shape[1]
             
-            for device in devices:
-                best_entity, bandwidth, delay, loss, rating = select_best_cloud(net, device, cloud_servers, cloud_loads, simulated_hour)
+            results = measure_round_robin(devices, cloud_servers, candidates)
+            state.metrics[device_rows, candidates] = np.array(results, dtype=np.float32).reshape(len(devices), k, 3)
+            
+            cycle_rows = []
+            for d, device in enumerate(devices):
+                best_idx, bandwidth, delay, loss, rating = select_best_cloud(
+                    device, candidates[d], results[d * k:(d + 1) * k], state, activity)
                 
-                if best_entity == 'self':
+                if best_idx < 0:
                     selected_entity = 'self'
                     cloud_features = [0, 0, 0]  # 자체 처리 시 클라우드 특성은 0으로 설정
                 else:
-                    selected_entity = f'cloud{best_entity.id}'
-                    cloud_loads[best_entity.id] += 1
-                    cloud_features = best_entity.get_features(simulated_hour)
+                    selected_entity = cloud_servers[best_idx].name
+                    state.loads[best_idx] += 1
+                    state.total_load += 1
+                    cloud_features = cloud_servers[best_idx].get_features(simulated_hour)
                 
                 device_features = device.get_features()
                 
-                row = [current_time, simulated_hour, f'device{device.id}', selected_entity,
+                row = [current_time, simulated_hour, device.name, selected_entity,
                        bandwidth, delay, loss, rating] + device_features + cloud_features + [activity]
-                writer.writerow(row)
+                cycle_rows.append(row)
                 
-                print(f"  Device {device.id} connected to {selected_entity} - Bandwidth: {bandwidth:.2f}, Delay: {delay:.2f}, Loss: {loss:.2f}, Rating: {rating:.2f}")
-                print(f"  Saved row: {row}")
+                log.debug("  Device %d connected to %s - Bandwidth: %.2f, Delay: %.2f, Loss: %.2f, Rating: %.2f",
+                          device.id, selected_entity, bandwidth, delay, loss, rating)
+            
+            # 주기당 한 번만 파일에 기록
+            writer.writerows(cycle_rows)
+            csvfile.flush()
             
-            print(f"Cloud loads after cycle {cycle_count}: {cloud_loads}")
-            print(f"Time elapsed: {current_time:.2f} seconds")
-            print("--------------------")
+            cloud_loads = {cloud.id: int(load) for cloud, load in zip(cloud_servers, state.loads)}
+            log.info("Cloud loads after cycle %d: %s", cycle_count, cloud_loads)
+            log.info("Time elapsed: %.2f seconds", current_time)
+            log.info("--------------------")
             
-            time.sleep(interval)
+            # 주기 소요 시간과 관계없이 interval 간격을 유지
+            deadline += interval
+            sleep_for = deadline - time.time()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            else:
+                log.warning("Cycle overran by %.2fs", -sleep_for)
+            now = time.time()
     
-    print(f"Simulation completed after {cycle_count} cycles. Results saved in 'simulation_results.csv'")
+    log.info("Simulation completed after %d cycles. Results saved in 'simulation_results.csv'", cycle_count)
 
 if __name__ == '__main__':
     num_clouds = 5
     num_devices = 15
     
-    print(f"Initializing simulation with {num_clouds} cloud servers and {num_devices} devices...")
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    log.info("Initializing simulation with %d cloud servers and %d devices...", num_clouds, num_devices)
     net, cloud_servers, devices = create_network(num_clouds, num_devices)
     
     save_characteristics(devices, cloud_servers)
     
     try:
         net.start()
+        attach_nodes(net, cloud_servers, devices)
+        start_iperf_servers(net, cloud_servers)
         run_simulation(net, cloud_servers, devices)
     except KeyboardInterrupt:
-        print("\nSimulation interrupted by user.")
+        log.info("\nSimulation interrupted by user.")
     except Exception as e:
-        print(f"An error occurred: {e}")
+        log.error("An error occurred: %s", e)
     finally:
         net.stop()
-        print("\nSimulation ended. Check 'simulation_results.csv' for detailed results.")
\ No newline at end of file
+        log.info("\nSimulation ended. Check 'simulation_results.csv' for detailed results.")
\ No newline at end of file